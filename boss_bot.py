@@ -2,9 +2,15 @@
 # -*- coding: utf-8 -*-
 import os
 import re
+import time
 import json
+import asyncio
+import heapq
+import signal
 import logging
+from dataclasses import dataclass, field, fields
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Tuple, List
 
@@ -13,6 +19,11 @@ from discord import app_commands
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
 
+try:
+    import orjson
+except ImportError:  # 未安裝 orjson 時退回標準庫 json
+    orjson = None
+
 # ===== env =====
 load_dotenv()
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -22,6 +33,7 @@ MY_GUILD = discord.Object(id=int(GUILD_ID)) if GUILD_ID else None
 
 EARLY_MINUTES = int(os.getenv("EARLY_MINUTES", "3"))          # 提前提醒分鐘
 ANTI_DUP_GRACE_SEC = int(os.getenv("ANTI_DUP_GRACE_SEC", "180"))
+CHECK_MAX_SLEEP_SEC = int(os.getenv("CHECK_MAX_SLEEP_SEC", "60"))  # 排程最長睡眠秒數（新增的 BOSS 最晚這麼久會被看到）
 
 # 預設 BOSS 與周期（分鐘）
 DEFAULT_BOSSES: dict[int, list[str]] = {
@@ -35,6 +47,11 @@ DEFAULT_BOSSES: dict[int, list[str]] = {
     720: ["B3", "33", "34", "37", "j80-3F"],
     840: ["41"],
 }
+# BOSS 名稱 → 預設周期
+_BOSS_PERIOD_INDEX: dict[str, int] = {name: pp for pp, names in DEFAULT_BOSSES.items() for name in names}
+
+# /killat 的 HHMM 快速路徑（剛好 4 位數）；其他寫法交給 strptime，行為與舊版一致
+_HHMM_RE = re.compile(r"([01]\d|2[0-3])([0-5]\d)")
 
 # ===== log =====
 logging.basicConfig(
@@ -46,55 +63,122 @@ log = logging.getLogger("boss-bot")
 # ===== data =====
 DATA_FILE = Path("records.json")
 
-# records[boss] = {
-#   "period": int,
-#   "last_kill": datetime|None,
-#   "user": str|None,
-#   "killed_by": str|None,
-#   "channel": int|None,
-#   "reminded": bool,
-#   "carded": bool,
-#   "card_channel_id": int|None,
-#   "card_msg_id": int|None,
-#   "manual_set_at": str(iso)|None,
-# }
-records: dict[str, dict] = {}
+
+@dataclass(slots=True)
+class BossRecord:
+    period: int = 120
+    last_kill: Optional[datetime] = None
+    channel: Optional[int] = None
+    user: Optional[str] = None
+    killed_by: Optional[str] = None
+    reminded: bool = False
+    carded: bool = False
+    card_channel_id: Optional[int] = None
+    card_msg_id: Optional[int] = None
+    manual_set_at: Optional[str] = None  # iso
+    # 以下為執行期快取，不寫入檔案
+    _respawn_ts: Optional[float] = field(default=None, repr=False, compare=False)
+    _remind_ts: Optional[float] = field(default=None, repr=False, compare=False)
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in _PERSISTED_FIELDS}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "BossRecord":
+        return cls(**{k: v for k, v in d.items() if k in _PERSISTED_FIELDS})
+
+
+_PERSISTED_FIELDS = tuple(f.name for f in fields(BossRecord) if not f.name.startswith("_"))
+
+records: dict[str, BossRecord] = {}
+
+# (下一次事件時間 POSIX 秒, boss)；過期或重複的項目在 _run_due 取出時自然略過
+_due_heap: list[tuple[float, str]] = []
+
+# 有變更待寫入（由 BossCog.flush_task 定期寫檔）
+_dirty = False
+
+
+def _json_default(o):
+    if isinstance(o, datetime):
+        return o.isoformat()
+    raise TypeError(f"無法序列化 {type(o).__name__}")
+
+
+def _dumps(obj) -> bytes:
+    if orjson:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, indent=2, default=_json_default).encode("utf-8")
+
+
+def _loads(data: bytes):
+    if orjson:
+        return orjson.loads(data)
+    return json.loads(data.decode("utf-8"))
+
+
+@lru_cache(maxsize=256)
+def _parse_iso(s: str) -> datetime:
+    return datetime.fromisoformat(s)
 
 
-def _dt_to_iso(dt: Optional[datetime]) -> Optional[str]:
-    return dt.isoformat() if isinstance(dt, datetime) else None
+def mark_dirty() -> None:
+    global _dirty
+    _dirty = True
+
+
+def _snapshot_records() -> dict:
+    # datetime 交給 _dumps 處理；底線開頭為執行期快取，不寫入
+    return {k: v.to_dict() for k, v in records.items()}
 
 
 def save_records() -> None:
-    out = {}
-    for k, v in records.items():
-        d = dict(v)
-        if isinstance(d.get("last_kill"), datetime):
-            d["last_kill"] = d["last_kill"].isoformat()
-        out[k] = d
-    DATA_FILE.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+    global _dirty
+    DATA_FILE.write_bytes(_dumps(_snapshot_records()))
+    _dirty = False
     log.info("已儲存 records.json（%d 筆）", len(records))
 
 
-def load_records() -> None:
+# 序列化在事件迴圈上完成（資料一致），寫檔丟到執行緒，不阻塞 gateway
+async def asave_records() -> None:
+    global _dirty
+    payload = _dumps(_snapshot_records())
+    # 序列化成功才清旗標；寫檔期間若有新變更會再設回 True
+    _dirty = False
+    try:
+        await asyncio.to_thread(DATA_FILE.write_bytes, payload)
+    except Exception:
+        _dirty = True
+        raise
+    # flush_task 每次寫檔都會走這裡，記成 debug 以免洗版
+    log.debug("已儲存 records.json（%d 筆）", len(records))
+
+
+# 回傳 True 表示載入時有修正舊資料，需要寫回檔案
+def load_records() -> bool:
     records.clear()
+    upgraded = False
     if not DATA_FILE.exists():
         log.info("第一次執行，尚未有 records.json，將在運行過程中建立。")
-        return
+        return upgraded
     try:
-        raw = json.loads(DATA_FILE.read_text(encoding="utf-8"))
+        raw = _loads(DATA_FILE.read_bytes())
         for k, v in raw.items():
             d = dict(v)
             lk = d.get("last_kill")
             if isinstance(lk, str):
                 try:
-                    d["last_kill"] = datetime.fromisoformat(lk)
+                    d["last_kill"] = _parse_iso(lk)
                 except Exception:
                     d["last_kill"] = None
-            records[k] = d
+                    upgraded = True
+            rec = BossRecord.from_dict(d)
+            refresh_due(k, rec)
+            records[k] = rec
         log.info("已載入 records.json（%d 筆）", len(records))
     except Exception:
         log.exception("讀取 records.json 失敗")
+    return upgraded
 
 
 # ===== helpers =====
@@ -110,25 +194,51 @@ def safe_period(p: Optional[int], fallback: int = 120) -> int:
         return fallback
 
 
+# 依 last_kill / period 重算快取的刷新與提醒時間（POSIX 秒），並排入 _due_heap
+def refresh_due(boss: str, rec: BossRecord) -> None:
+    if not rec.last_kill:
+        rec._respawn_ts = None
+        rec._remind_ts = None
+        return
+    rec._respawn_ts = (rec.last_kill + timedelta(minutes=safe_period(rec.period))).timestamp()
+    rec._remind_ts = rec._respawn_ts - EARLY_MINUTES * 60
+    heapq.heappush(_due_heap, (rec._remind_ts, boss))
+
+
+# 處理完後的下一個事件時間；沒有待辦事件則回傳 None
+def next_due_ts(rec: BossRecord, now_ts: float) -> Optional[float]:
+    if rec._respawn_ts is None:
+        return None
+    if not rec.reminded and rec._remind_ts > now_ts:
+        return rec._remind_ts
+    if not rec.carded and rec._respawn_ts > now_ts:
+        return rec._respawn_ts
+    return None
+
+
 def ensure_boss(boss: str, period_hint: Optional[int] = None) -> str:
     b = boss.strip()
     if b not in records:
-        per = period_hint
-        if per is None:
-            for pp, names in DEFAULT_BOSSES.items():
-                if b in names:
-                    per = pp
-                    break
-        per = per or 120
-        records[b] = {"period": int(per), "last_kill": None, "channel": None}
+        per = period_hint or _BOSS_PERIOD_INDEX.get(b, 120)
+        records[b] = BossRecord(period=int(per))
+        refresh_due(b, records[b])
     return b
 
 
+# 常用寬度的進度條預先算好（卡片用 18，預設 16）
+_BARS: dict[int, tuple[str, ...]] = {
+    w: tuple("#" * i + "-" * (w - i) for i in range(w + 1)) for w in (16, 18)
+}
+
+
 def progress_bar(elapsed: timedelta, total_minutes: int, width: int = 16) -> str:
     total = max(1, total_minutes * 60)
     e = max(0, min(total, int(elapsed.total_seconds())))
     filled = int(round(e / total * width))
     filled = max(0, min(width, filled))
+    bars = _BARS.get(width)
+    if bars:
+        return bars[filled]
     return "#" * filled + "-" * (width - filled)
 
 
@@ -178,26 +288,25 @@ def chunk_text_blocks(lines: List[str], max_len: int = 950) -> List[str]:
 
 
 def fmt_m_d(dt: Optional[datetime]) -> str:
-    return "--/--" if not dt else dt.strftime("%m-%d")
+    return "--/--" if not dt else f"{dt.month:02d}-{dt.day:02d}"
 
 
 def fmt_h_m(dt: Optional[datetime]) -> str:
-    return "--:--" if not dt else dt.strftime("%H:%M")
+    return "--:--" if not dt else f"{dt.hour:02d}:{dt.minute:02d}"
 
 
 # ===== embed =====
 def build_boss_card(
     boss: str,
-    rec: dict,
-    now: Optional[datetime] = None,
+    rec: BossRecord,
+    now: datetime,
     *,
     state_override: Optional[str] = None,
     color_override: Optional[discord.Color] = None,
     footer_text: Optional[str] = None,
 ) -> discord.Embed:
-    now = now or datetime.now()
-    period = safe_period(rec.get("period", 120))
-    last: Optional[datetime] = rec.get("last_kill")
+    period = safe_period(rec.period)
+    last: Optional[datetime] = rec.last_kill
 
     state_line = "等待中"
     color = discord.Color.greyple()
@@ -206,12 +315,10 @@ def build_boss_card(
     remain_text = "未設定"
 
     if last:
-        respawn = last + timedelta(minutes=period)
-        remain = respawn - now
         elapsed = now - last
         bar_text = progress_bar(elapsed, period, 18)
 
-        sym, remain_text_calc, _, miss_times, _minutes_over = status_of(period, last, now)
+        sym, remain_text_calc, respawn, miss_times, _minutes_over = status_of(period, last, now)
         if sym == "SPAWNED":
             state_line = "已刷新"
             color = discord.Color.red()
@@ -263,13 +370,14 @@ class BossKillView(discord.ui.View):
         b = ensure_boss(self.boss)
         now = datetime.now()
         rec = records[b]
-        rec["last_kill"] = now
-        rec["killed_by"] = interaction.user.display_name
-        rec.pop("reminded", None)
-        rec.pop("carded", None)
-        rec.pop("card_channel_id", None)
-        rec.pop("card_msg_id", None)
-        save_records()
+        rec.last_kill = now
+        rec.killed_by = interaction.user.display_name
+        refresh_due(b, rec)
+        rec.reminded = False
+        rec.carded = False
+        rec.card_channel_id = None
+        rec.card_msg_id = None
+        mark_dirty()
 
         e = build_boss_card(
             b, rec, now,
@@ -289,80 +397,147 @@ class BossKillView(discord.ui.View):
 class BossCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.check_task.start()
+        self._channel_cache: dict[int, discord.abc.Messageable] = {}
+        self._owner_id: Optional[int] = None
+        self._scheduler_task = self.bot.loop.create_task(self._scheduler())
+        self.flush_task.start()
 
     def cog_unload(self):
-        self.check_task.cancel()
+        self._scheduler_task.cancel()
+        self.flush_task.cancel()
+        if _dirty:
+            save_records()
+
+    async def _get_channel(self, chan_id: int) -> discord.abc.Messageable:
+        channel = self._channel_cache.get(chan_id) or self.bot.get_channel(chan_id)
+        if channel is None:
+            channel = await self.bot.fetch_channel(chan_id)
+        self._channel_cache[chan_id] = channel
+        return channel
 
     async def _disable_existing_card(self, boss: str):
-        rec = records.get(boss, {})
-        chan_id = rec.get("card_channel_id")
-        msg_id = rec.get("card_msg_id")
-        if not chan_id or not msg_id:
+        rec = records.get(boss)
+        if rec is None or not rec.card_channel_id or not rec.card_msg_id:
             return
+        chan_id, msg_id = rec.card_channel_id, rec.card_msg_id
         try:
-            channel = self.bot.get_channel(chan_id) or await self.bot.fetch_channel(chan_id)
+            channel = await self._get_channel(chan_id)
             msg = await channel.fetch_message(msg_id)
             await msg.edit(view=BossKillView(boss, disabled=True))
-            rec.pop("card_channel_id", None)
-            rec.pop("card_msg_id", None)
-            save_records()
+            rec.card_channel_id = None
+            rec.card_msg_id = None
+            mark_dirty()
         except Exception as e:
             log.warning("無法停用舊卡片：%s", e)
 
-    @tasks.loop(seconds=60)
-    async def check_task(self):
-        now = datetime.now()
-        for name, rec in list(records.items()):
-            if not rec.get("last_kill") or not rec.get("period"):
-                continue
-
-            kill = rec["last_kill"]
-            period = safe_period(rec["period"])
-            respawn = kill + timedelta(minutes=period)
-            remind_time = respawn - timedelta(minutes=EARLY_MINUTES)
+    # 睡到下一個事件時間（最多 CHECK_MAX_SLEEP_SEC）再檢查，取代固定每分鐘輪詢
+    async def _scheduler(self):
+        await self.bot.wait_until_ready()
+        while True:
+            try:
+                await self._run_due()
+            except Exception:
+                log.exception("排程檢查失敗")
+            delay = CHECK_MAX_SLEEP_SEC
+            if _due_heap:
+                delay = min(delay, max(0.0, _due_heap[0][0] - time.time()))
+            await asyncio.sleep(delay)
 
-            chan_id = rec.get("channel")
-            if not chan_id:
+    async def _run_due(self):
+        now = datetime.now()
+        now_ts = now.timestamp()
+        # 只處理已到期的 BOSS（同名去重，保留順序）
+        due: dict[str, None] = {}
+        while _due_heap and _due_heap[0][0] <= now_ts:
+            due[heapq.heappop(_due_heap)[1]] = None
+
+        # 先同步決定要送什麼，再一次併發送出
+        # 這段迴圈沒有 await，不必複製 records；已被 /del 的 BOSS 由 records.get 略過
+        sends = []
+        for name in due:
+            rec = records.get(name)
+            if rec is None:
                 continue
-            channel = self.bot.get_channel(chan_id) or await self.bot.fetch_channel(chan_id)
-            if not channel:
+            # 單一 BOSS 出錯不影響其他 BOSS；這個 BOSS 下一輪再重試，不會從 heap 消失
+            try:
+                coro = self._prepare_due(name, rec, now, now_ts)
+            except Exception:
+                log.exception("處理 %s 失敗，%d 秒後重試", boss_label(name), CHECK_MAX_SLEEP_SEC)
+                heapq.heappush(_due_heap, (now_ts + CHECK_MAX_SLEEP_SEC, name))
                 continue
-
-            # 提前提醒
-            if not rec.get("reminded") and now >= remind_time and now < respawn:
-                rec["reminded"] = True
-                e = build_boss_card(name, rec, now, state_override=f"即將刷新（{EARLY_MINUTES} 分內）")
-                try:
-                    await channel.send(embed=e)
-                    save_records()
-                except Exception:
-                    log.exception("提前提醒送出失敗")
-
-            # 到點發卡
-            if not rec.get("carded") and now >= respawn:
-                rec["carded"] = True
-                disable_view = False
-                if rec.get("manual_set_at"):
-                    try:
-                        set_at = datetime.fromisoformat(rec["manual_set_at"])
-                        if (now - set_at).total_seconds() <= ANTI_DUP_GRACE_SEC:
-                            disable_view = True
-                    except Exception:
-                        pass
-
-                e = build_boss_card(name, rec, now, state_override="已刷新")
+            if coro is not None:
+                sends.append(coro)
+            next_ts = next_due_ts(rec, now_ts)
+            if next_ts is not None:
+                heapq.heappush(_due_heap, (next_ts, name))
+        if sends:
+            await asyncio.gather(*sends)
+
+    # 回傳待送出的 coroutine；提醒與發卡的時間區間互斥，每個 BOSS 每輪最多一則
+    def _prepare_due(self, name: str, rec: BossRecord, now: datetime, now_ts: float):
+        respawn_ts = rec._respawn_ts
+        if respawn_ts is None:
+            return None
+
+        chan_id = rec.channel
+        if not chan_id:
+            return None
+
+        # 提前提醒
+        # 旗標在建卡成功後才設，建卡失敗時重試仍會送出
+        if not rec.reminded and rec._remind_ts <= now_ts < respawn_ts:
+            e = build_boss_card(name, rec, now, state_override=f"即將刷新（{EARLY_MINUTES} 分內）")
+            rec.reminded = True
+            return self._send_reminder(chan_id, e)
+
+        # 到點發卡
+        if not rec.carded and now_ts >= respawn_ts:
+            disable_view = False
+            if rec.manual_set_at:
                 try:
-                    msg = await channel.send(embed=e, view=BossKillView(name, disabled=disable_view))
-                    rec["card_channel_id"] = msg.channel.id
-                    rec["card_msg_id"] = msg.id
-                    save_records()
+                    set_at = _parse_iso(rec.manual_set_at)
+                    if (now - set_at).total_seconds() <= ANTI_DUP_GRACE_SEC:
+                        disable_view = True
                 except Exception:
-                    log.exception("刷新卡片送出失敗")
+                    pass
 
-    @check_task.before_loop
-    async def before_check(self):
-        await self.bot.wait_until_ready()
+            e = build_boss_card(name, rec, now, state_override="已刷新")
+            rec.carded = True
+            return self._send_card(name, rec, chan_id, e, disable_view)
+        return None
+
+    async def _send_reminder(self, chan_id: int, e: discord.Embed):
+        try:
+            channel = await self._get_channel(chan_id)
+            await channel.send(embed=e)
+            mark_dirty()
+        except discord.NotFound:
+            self._channel_cache.pop(chan_id, None)
+            log.warning("找不到頻道 %s，略過提前提醒", chan_id)
+        except Exception:
+            log.exception("提前提醒送出失敗")
+
+    async def _send_card(self, name: str, rec: BossRecord, chan_id: int, e: discord.Embed, disable_view: bool):
+        try:
+            channel = await self._get_channel(chan_id)
+            msg = await channel.send(embed=e, view=BossKillView(name, disabled=disable_view))
+            rec.card_channel_id = msg.channel.id
+            rec.card_msg_id = msg.id
+            mark_dirty()
+        except discord.NotFound:
+            self._channel_cache.pop(chan_id, None)
+            log.warning("找不到頻道 %s，略過刷新卡片", chan_id)
+        except Exception:
+            log.exception("刷新卡片送出失敗")
+
+    @tasks.loop(seconds=5)
+    async def flush_task(self):
+        if not _dirty:
+            return
+        try:
+            await asave_records()
+        except Exception:
+            log.exception("儲存 records.json 失敗")
 
     async def _send_embeds(self, interaction: discord.Interaction, embeds: list[discord.Embed]):
         if not embeds:
@@ -386,8 +561,9 @@ class BossCog(commands.Cog):
     @app_commands.checks.has_permissions(administrator=True)
     async def add_(self, interaction: discord.Interaction, boss: str, period: int):
         b = ensure_boss(boss, period)
-        records[b]["period"] = int(period)
-        save_records()
+        records[b].period = int(period)
+        refresh_due(b, records[b])
+        mark_dirty()
         await interaction.response.send_message(f"已新增 {boss_label(b)}，週期 {period} 分。", ephemeral=True)
 
     @app_commands.command(name="set", description="設定 BOSS 週期（分鐘）")
@@ -395,8 +571,9 @@ class BossCog(commands.Cog):
     @app_commands.checks.has_permissions(administrator=True)
     async def set_(self, interaction: discord.Interaction, boss: str, period: int):
         b = ensure_boss(boss)
-        records[b]["period"] = int(period)
-        save_records()
+        records[b].period = int(period)
+        refresh_due(b, records[b])
+        mark_dirty()
         await interaction.response.send_message(f"已更新 {boss_label(b)} 週期為 {period} 分。", ephemeral=True)
 
     @app_commands.command(name="del", description="刪除 BOSS")
@@ -406,7 +583,7 @@ class BossCog(commands.Cog):
         b = boss.strip()
         if b in records:
             records.pop(b)
-            save_records()
+            mark_dirty()
             await interaction.response.send_message(f"已刪除 {boss_label(b)}。", ephemeral=True)
         else:
             await interaction.response.send_message("找不到該 BOSS。", ephemeral=True)
@@ -414,13 +591,14 @@ class BossCog(commands.Cog):
     @app_commands.command(name="clear", description="清空所有擊殺狀態（保留週期）")
     @app_commands.checks.has_permissions(administrator=True)
     async def clear_(self, interaction: discord.Interaction):
-        for _, rec in records.items():
-            rec["last_kill"] = None
-            rec.pop("reminded", None)
-            rec.pop("carded", None)
-            rec.pop("card_channel_id", None)
-            rec.pop("card_msg_id", None)
-        save_records()
+        for b, rec in records.items():
+            rec.last_kill = None
+            refresh_due(b, rec)
+            rec.reminded = False
+            rec.carded = False
+            rec.card_channel_id = None
+            rec.card_msg_id = None
+        mark_dirty()
         await interaction.response.send_message("已清空擊殺狀態。", ephemeral=True)
 
     # ===== 使用 =====
@@ -430,14 +608,15 @@ class BossCog(commands.Cog):
         b = ensure_boss(boss)
         now = datetime.now()
         rec = records[b]
-        rec["last_kill"] = now
-        rec["channel"] = interaction.channel.id
-        rec["user"] = interaction.user.display_name
-        rec["manual_set_at"] = now.isoformat()
-        rec.pop("reminded", None)
-        rec.pop("carded", None)
+        rec.last_kill = now
+        rec.channel = interaction.channel.id
+        rec.user = interaction.user.display_name
+        rec.manual_set_at = now.isoformat()
+        refresh_due(b, rec)
+        rec.reminded = False
+        rec.carded = False
         await self._disable_existing_card(b)
-        save_records()
+        mark_dirty()
 
         e = build_boss_card(b, rec, now, footer_text=f"操作人：{interaction.user.display_name}")
         log.info("/k by %s in #%s -> %s", interaction.user, interaction.channel, b)
@@ -448,22 +627,28 @@ class BossCog(commands.Cog):
     async def killat_(self, interaction: discord.Interaction, boss: str, time_hhmm: str):
         b = ensure_boss(boss)
         now = datetime.now()
-        try:
-            t = datetime.strptime(time_hhmm, "%H%M")
-            kill_time = now.replace(hour=t.hour, minute=t.minute, second=0, microsecond=0)
-        except ValueError:
-            await interaction.response.send_message("時間格式錯誤，請輸入 HHMM（例如 2340）。", ephemeral=True)
-            return
+        m = _HHMM_RE.fullmatch(time_hhmm)
+        if m:
+            hh, mm = int(m.group(1)), int(m.group(2))
+        else:
+            try:
+                t = datetime.strptime(time_hhmm, "%H%M")
+                hh, mm = t.hour, t.minute
+            except ValueError:
+                await interaction.response.send_message("時間格式錯誤，請輸入 HHMM（例如 2340）。", ephemeral=True)
+                return
+        kill_time = now.replace(hour=hh, minute=mm, second=0, microsecond=0)
 
         rec = records[b]
-        rec["last_kill"] = kill_time
-        rec["channel"] = interaction.channel.id
-        rec["user"] = interaction.user.display_name
-        rec["manual_set_at"] = now.isoformat()
-        rec.pop("reminded", None)
-        rec.pop("carded", None)
+        rec.last_kill = kill_time
+        rec.channel = interaction.channel.id
+        rec.user = interaction.user.display_name
+        rec.manual_set_at = now.isoformat()
+        refresh_due(b, rec)
+        rec.reminded = False
+        rec.carded = False
         await self._disable_existing_card(b)
-        save_records()
+        mark_dirty()
 
         e = build_boss_card(b, rec, now, footer_text=f"設定人：{interaction.user.display_name}")
         log.info("/killat by %s -> %s %s", interaction.user, b, time_hhmm)
@@ -474,7 +659,7 @@ class BossCog(commands.Cog):
     async def when_(self, interaction: discord.Interaction, boss: str):
         b = ensure_boss(boss)
         rec = records[b]
-        if not rec.get("last_kill"):
+        if not rec.last_kill:
             await interaction.response.send_message(f"{boss_label(b)} 尚未設定擊殺時間。", ephemeral=True)
             return
         now = datetime.now()
@@ -487,21 +672,21 @@ class BossCog(commands.Cog):
         now = datetime.now()
         limit = max(1, min(int(limit or 10), 40))
         items = []
-        for b, rec in records.items():
-            last = rec.get("last_kill")
+        for i, (b, rec) in enumerate(records.items()):
+            last = rec.last_kill
             if not last:
                 continue
-            period = safe_period(rec.get("period"))
+            period = safe_period(rec.period)
             sym, _, respawn, miss_times, _ = status_of(period, last, now)
             if not respawn:
                 continue
             left_sec = max(0, int((respawn - now).total_seconds()))
-            items.append((b, period, last, respawn, sym, miss_times, left_sec))
-        items.sort(key=lambda x: x[6])
+            items.append((left_sec, i, b, period, last, respawn, sym, miss_times))
+        # 同秒數時依 records 順序（i 唯一，不會比到後面的欄位），與原本的穩定排序一致
+        top = heapq.nsmallest(limit, items)
 
         lines: list[str] = []
-        shown = 0
-        for b, period, last, respawn, sym, miss_times, _ in items:
+        for _, _, b, period, last, respawn, sym, miss_times in top:
             if sym == "MISSED" and miss_times and miss_times >= 1:
                 tail = f"已超過 {miss_times} 輪"
             elif sym == "SPAWNED":
@@ -509,19 +694,17 @@ class BossCog(commands.Cog):
             else:
                 tail = pretty_compact(respawn - now)
 
-            lines.append(f"• {boss_label(b)}：{tail}")
-            lines.append(f"  上次：{fmt_m_d(last)} {fmt_h_m(last)}")
-            lines.append(f"  預計：{fmt_m_d(respawn)} {fmt_h_m(respawn)}")
-            lines.append("")
-            shown += 1
-            if shown >= limit:
-                break
+            lines.append(
+                f"• {boss_label(b)}：{tail}\n"
+                f"  上次：{fmt_m_d(last)} {fmt_h_m(last)}\n"
+                f"  預計：{fmt_m_d(respawn)} {fmt_h_m(respawn)}\n\n"
+            )
 
         if not lines:
             await interaction.response.send_message("尚無可列出的 BOSS。", ephemeral=True)
             return
 
-        text = "```" + "\n".join(lines).rstrip() + "```"
+        text = "```" + "".join(lines).rstrip() + "```"
         e = discord.Embed(title="📋 BOSS 狀態列表", description=text)
         e.set_footer(text=f"總計 {len(items)}，顯示 {min(limit, len(items))}。/all limit:20 可顯示更多")
         await interaction.response.send_message(embed=e)
@@ -529,8 +712,9 @@ class BossCog(commands.Cog):
     # ===== 權限與同步 =====
     @app_commands.command(name="sync", description="同步 Slash 指令（管理員/擁有者）")
     async def sync_cmd(self, interaction: discord.Interaction):
-        app_owner = (await interaction.client.application_info()).owner
-        is_owner = interaction.user.id == app_owner.id
+        if self._owner_id is None:
+            self._owner_id = (await interaction.client.application_info()).owner.id
+        is_owner = interaction.user.id == self._owner_id
         is_admin = getattr(interaction.user.guild_permissions, "administrator", False)
         if not (is_owner or is_admin):
             await interaction.response.send_message("沒有權限。", ephemeral=True)
@@ -559,12 +743,22 @@ class BossBot(commands.Bot):
     async def setup_hook(self):
         await self.add_cog(BossCog(self))
 
-        # 預先補上預設清單
-        for p, names in DEFAULT_BOSSES.items():
-            for n in names:
-                ensure_boss(n, p)
-        load_records()
-        save_records()
+        # 雲端平台重啟時送 SIGTERM；改走 close()，讓 cog_unload 把尚未寫入的變更存檔
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self._on_sigterm)
+        except NotImplementedError:  # Windows 不支援
+            pass
+
+        upgraded = load_records()
+        # 第一次執行時預先補上預設清單（已有檔案就不補，避免把 /del 刪掉的 BOSS 加回來）
+        added = False
+        if not DATA_FILE.exists():
+            for p, names in DEFAULT_BOSSES.items():
+                for n in names:
+                    ensure_boss(n, p)
+            added = bool(records)
+        if added or upgraded:
+            await asave_records()
 
         try:
             if MY_GUILD:
@@ -577,6 +771,10 @@ class BossBot(commands.Bot):
         except Exception:
             log.exception("同步指令失敗")
 
+    def _on_sigterm(self):
+        log.info("收到 SIGTERM，準備關閉。")
+        self._close_task = asyncio.create_task(self.close())
+
 
 intents = discord.Intents.default()
 intents.message_content = True